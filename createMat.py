@@ -1,8 +1,10 @@
 import sys
 import os
 import pickle
+from multiprocessing import Pool
 import numpy as np
-from os.path import exists
+
+import parsePileups
 
 # this function parses paramaters passed in through the command line or sets them to a default vakue
 # paramaters:
@@ -13,12 +15,16 @@ from os.path import exists
 #   out_dir: the directory in which to store outputs from the script
 #   mat_name: the name that the matrix created by the script will be stored as
 #   ct_name: the name that the ordered list of Ct values created by the script will be stored as
+#   id_name: the name that the ordered list of genome ids created by the script will be stored as
+#   workers: the number of worker processes used to read the lists
 def parseParams(args, start_dir):
     # setting default values for each parameter:
     lists_dir = start_dir + "/pileup_lists/" # (-l)
     out_dir = start_dir + "/output/" # (-o)
     mat_name = out_dir + "pileup_matrix.npy" # (-m)
     ct_name = out_dir + "pileup_cts.pkl" # (-c)
+    id_name = out_dir + "pileup_ids.pkl" # (-g)
+    workers = os.cpu_count() # (-w)
 
 
     for i in range(len(args)):
@@ -37,16 +43,29 @@ def parseParams(args, start_dir):
                 out_dir = out_dir + "/"
             mat_name = out_dir + "pileup_matrix.npy"
             ct_name = out_dir + "pileup_cts.pkl"
+            id_name = out_dir + "pileup_ids.pkl"
         elif (args[i] == "-m" or args[i] == "--mat_name"):
             mat_name = out_dir + args[i + 1]
         elif (args[i] == "-c" or args[i] == "--ct_name"):
             ct_name = out_dir + args[i + 1]
+        elif (args[i] == "-g" or args[i] == "--id_name"):
+            id_name = out_dir + args[i + 1]
+        elif (args[i] == "-w" or args[i] == "--workers"):
+            workers = int(args[i + 1])
+
+    # exitting the script if the number of workers is not positive
+    if (workers < 1):
+        print("Error: workers (-w) must be at least 1")
+        sys.exit()
+
+    # np.save adds the .npy extension if it is missing, the matrix is stored under the same name
+    if (mat_name.endswith(".npy") == False):
+        mat_name+=".npy"
 
     # creating output_dir if it does not already exist:
-    if (exists(out_dir) == False):
-        os.system("mkdir " + out_dir)
+    os.makedirs(out_dir, exist_ok=True)
 
-    return lists_dir, out_dir, mat_name, ct_name
+    return lists_dir, out_dir, mat_name, ct_name, id_name, workers
 
 
 # returns a string of all the options for the script if the script was called with -h or --help
@@ -55,60 +74,99 @@ def helpOption():
     s+="\n-o --out_dir:\tthe directory in which to store outputs from the script. The default is ./output"
     s+="\n-m --mat_name:\tthe name that the pileup matrix created by the script will be stored as. The default is 'pileup_matrix.npy'"
     s+="\n-c --ct_name:\tthe name that the ordered list of Ct values created by the script will be stored as. The default is 'pileup_cts.pkl'"
+    s+="\n-g --id_name:\tthe name that the ordered list of genome ids created by the script will be stored as. The default is 'pileup_ids.pkl'"
+    s+="\n-w --workers:\tthe number of worker processes used to read the lists. The default is the number of CPUs"
     return s
 
 
-# reads every parsed list file in the lists_dir directory and appends it to an array
+# reads a range of rows of the matrix from their list files and writes them into the (preallocated) matrix file
+# every worker writes to its own range of rows, so the workers never write to the same part of the file
+# adds -1 (representing the absence of this nucleotide position in the genome) to the end of all shorter lists so that every row has the same length
 # parameters:
-#   lists_dir: the directory of pileup lists
+#   chunk: a tuple of (lists_dir, the list file names of the rows, the index of the first row, the path to the matrix file)
 # returns:
-#   cts: the list of Ct values corresponding to the order of rows in the array
-#   arr: the array created by appending all the pileup lists in the directory
-#   max_len: the length of the longest row in the array
-def makeArray(lists_dir):
-    arr = [] # initialize array
-    # initialize Ct value list
+#   cts: the list of Ct values of the rows
+#   max_len: the length of the longest list of the rows
+def loadChunk(chunk):
+    lists_dir, names, start, scratch_name = chunk
+    mat = np.load(scratch_name, mmap_mode="r+")
+    cols = mat.shape[1]
     cts = []
-    max_len = 0 # keep track of the longest list
-    ind = 0
-
-    for filename in os.scandir(lists_dir):
-        f = str(filename).strip("<DirEntry ' ''>")
-        if (f.endswith(".pkl")): # checking that the file has the right extension
-            genome_id = str(f).replace(".pkl", "")
-
-            fi = open((lists_dir + f), "rb")  # open the list
-            lst = pickle.load(fi)
-
-            if (len(lst) > max_len):
-                max_len = len(lst)
-
-            # updating every 250 lists read
-            if (ind % 250 == 0):
-                print("\tread list: ", ind)
-            ind = ind + 1
-
-            # updating the metadata lists:
-            cts.append(lst[0])
-            # removing the Ct value from this list and adding it to the array
-            del lst[0]
-            arr.append(lst)
-
-    return cts, arr, max_len
-
-
-# evens the lengths of all of the rows in the array
-# adds -1 (representing the absence of this nucleotide position in the genome) to the end of all shorter lists so that every row has the same length
+    max_len = 0
+
+    for i in range(len(names)):
+        fi = open((lists_dir + names[i]), "rb")  # open the list
+        lst = pickle.load(fi)
+        fi.close()
+
+        # updating every 250 lists read
+        if ((start + i) % 250 == 0):
+            print("\tread list: ", (start + i))
+
+        # removing the Ct value from this list and adding it to the matrix
+        cts.append(lst[0])
+        l = len(lst) - 1
+        if (l > cols):
+            raise ValueError("list " + names[i] + " is longer than the longest possible parsed pileup list")
+        mat[start + i, :l] = lst[1:]
+        mat[start + i, l:] = -1
+        if (l > max_len):
+            max_len = l
+
+    mat.flush()
+    del mat
+    return cts, max_len
+
+
+# reads every parsed list file in the lists_dir directory into a matrix in the order of the sorted genome ids
+# the matrix is preallocated as a .npy file as wide as the longest possible list and the rows are filled by worker processes,
+#   then it is narrowed to the longest list read, so the output is the same regardless of the number of workers
 # parameters:
-#   arr: the array to even
-#   max_len: the length of the longest row of the array
-def evenLength(arr, max_len):
-    for i in range(len(arr)):
-        l = arr[i] # get current row (list)
-        if (len(l) < max_len):
-            for j in range((max_len - len(l))):
-                arr[i].append(-1) # adding -1 until the length of this row is max_len
-    return arr
+#   lists_dir: the directory of pileup lists
+#   mat_name: the path to store the matrix as
+#   workers: the number of worker processes
+# returns:
+#   genome_ids: the sorted list of genome ids corresponding to the order of rows in the matrix
+#   cts: the list of Ct values corresponding to the order of rows in the matrix
+def makeArray(lists_dir, mat_name, workers):
+    names = sorted([f for f in os.listdir(lists_dir) if f.endswith(".pkl")]) # checking that the file has the right extension
+    genome_ids = [f.replace(".pkl", "") for f in names]
+
+    # preallocating the matrix in a scratch file next to the final matrix
+    scratch_name = mat_name + ".tmp"
+    mat = np.lib.format.open_memmap(scratch_name, mode="w+", dtype=np.float64, shape=(len(names), parsePileups.maxListLen()))
+    del mat
+
+    # the scratch file is as big as the whole matrix, it is removed even if reading the lists fails
+    try:
+        # splitting the rows into one contiguous range per worker
+        bounds = [int(round(w * len(names) / workers)) for w in range(workers + 1)]
+        chunks = [(lists_dir, names[bounds[w]:bounds[w + 1]], bounds[w], scratch_name) for w in range(workers) if (bounds[w] < bounds[w + 1])]
+        if (len(chunks) > 1):
+            with Pool(len(chunks)) as pool:
+                results = pool.map(loadChunk, chunks)
+        else:
+            results = [loadChunk(c) for c in chunks]
+
+        cts = []
+        max_len = 0
+        for chunk_cts, chunk_len in results:
+            cts+=chunk_cts
+            max_len = max(max_len, chunk_len)
+
+        # removing the columns past the longest list read
+        mat = np.load(scratch_name, mmap_mode="r")
+        if (max_len == mat.shape[1]):
+            del mat
+            os.replace(scratch_name, mat_name)
+        else:
+            np.save(mat_name, mat[:, :max_len])
+            del mat
+    finally:
+        if (os.path.exists(scratch_name)):
+            os.remove(scratch_name)
+
+    return genome_ids, cts
 
 
 # main functions
@@ -120,26 +178,23 @@ def main(argv):
     start_dir = os.getcwd() # current directory
 
     # set parameters:
-    lists_dir, strt, mat_name, ct_name = parseParams(args, start_dir)
+    lists_dir, strt, mat_name, ct_name, id_name, workers = parseParams(args, start_dir)
     print("--createMat.py-- set parameters")
 
-    # read in the parsed lists created by parsePileups.py to create the matrix
-    cts, arr, max_len = makeArray(lists_dir)
+    # read in the parsed lists created by parsePileups.py to create and store the matrix
+    # the rows are evened by adding -1 to the ends of shorter genomes
+    genome_ids, cts = makeArray(lists_dir, mat_name, workers)
     print("--makePileupMat.py-- made matrix")
 
-    # even the lengths of all rows by adding -1 to the ends of shorter genomes
-    even_arr = evenLength(arr, max_len)
-    print("--makePileupMat.py-- evened array lengths")
-
-    # storing the matrix as a numpy array
-    mat = np.array(even_arr, dtype=np.float64)
-    np.save(mat_name, mat)
-
-    # save the Ct value list:
+    # save the Ct value and genome id lists:
     f_opn = open(ct_name, "wb")
     pickle.dump(cts, f_opn)
+    f_opn.close()
+    f_opn = open(id_name, "wb")
+    pickle.dump(genome_ids, f_opn)
+    f_opn.close()
 
-    print("--createMat.py-- saved matrix as: ", mat_name, " and Ct value list as: ", ct_name)
+    print("--createMat.py-- saved matrix as: ", mat_name, ", Ct value list as: ", ct_name, " and genome id list as: ", id_name)
 
 
 # if this is the script called by python (vs being called by another)
@@ -1,4 +1,3 @@
-peline.sh
 #!/bin/bash
 # runs the Ct value prediction script pipeline
 
@@ -30,7 +29,7 @@ then
     echo "$space[-o out_dir] [-m mat_name] [-c ct_name]"
     echo "$space[-f out_file] [-n model_name] [-u num_trees]"
     echo "$space[-e tree_depth] [-r row_sub] [-i pileup_path - required]"
-    echo "$space[-t tmp_dir]"
+    echo "$space[-t tmp_dir - parent of the temporary directory]"
     echo " "
     echo "one or more required arguments missing: "
     echo "    -d: metadata_path"
@@ -43,44 +42,38 @@ fi
 SCRIPT_DIR=$( cd -- "$( dirname -- "${BASH_SOURCE[0]}" )" &> /dev/null && pwd )
 
 # checking all the arguments and creating the commands for each script:
-base="python3 "
-base+="$SCRIPT_DIR"
-base+="/"
-c1="$base"
-c1+="parsePileups.py"
-c2="$base"
-c2+="createMat.py"
-c3="$base"
-c3+="trainModel.py"
-c4="$base"
-c4+="predictCt.py"
+# each command is an array of its arguments, so paths containing spaces are passed as one argument
+c1=(python3 "$SCRIPT_DIR/parsePileups.py")
+c2=(python3 "$SCRIPT_DIR/createMat.py")
+c3=(python3 "$SCRIPT_DIR/trainModel.py")
+c4=(python3 "$SCRIPT_DIR/predictCt.py")
 
-c4+=" -i $pileup_path"
-if ! [ -z "$tmp_dir" ]; then c4+=" -t $tmp_dir"; fi
-if ! [ -z "$pileups_dir" ]; then c1+=" -p $pileups_dir"; fi
-if ! [ -z "$lists_dir" ]; then c1+=" -l $lists_dir"; c2+=" -l $lists_dir"; fi
-c1+=" -d $metadata_path"
-if ! [ -z "$out_dir" ]; then c2+=" -o $out_dir"; c3+=" -o $out_dir"; c4+=" -o $out_dir"; fi
-if ! [ -z "$mat_name" ]; then c2+=" -m $mat_name"; c3+=" -m $mat_name"; fi
-if ! [ -z "$ct_name" ]; then c2+=" -c $ct_name"; c3+=" -c $ct_name"; fi
-if ! [ -z "$out_file" ]; then c3+=" -f $out_file"; fi
-if ! [ -z "$model_name" ]; then c3+=" -n $model_name"; c4+=" -n $model_name"; fi
-if ! [ -z "$num_trees" ]; then c3+=" -nt $num_trees"; fi
-if ! [ -z "$tree_depth" ]; then c3+=" -td $tree_depth"; fi
-if ! [ -z "$row_sub" ]; then c3+=" -rs $row_sub"; fi
+c4+=(-i "$pileup_path")
+if ! [ -z "$tmp_dir" ]; then c4+=(-t "$tmp_dir"); fi
+if ! [ -z "$pileups_dir" ]; then c1+=(-p "$pileups_dir"); fi
+if ! [ -z "$lists_dir" ]; then c1+=(-l "$lists_dir"); c2+=(-l "$lists_dir"); fi
+c1+=(-d "$metadata_path")
+if ! [ -z "$out_dir" ]; then c2+=(-o "$out_dir"); c3+=(-o "$out_dir"); c4+=(-o "$out_dir"); fi
+if ! [ -z "$mat_name" ]; then c2+=(-m "$mat_name"); c3+=(-m "$mat_name"); fi
+if ! [ -z "$ct_name" ]; then c2+=(-c "$ct_name"); c3+=(-c "$ct_name"); fi
+if ! [ -z "$out_file" ]; then c3+=(-f "$out_file"); fi
+if ! [ -z "$model_name" ]; then c3+=(-n "$model_name"); c4+=(-n "$model_name"); fi
+if ! [ -z "$num_trees" ]; then c3+=(-nt "$num_trees"); fi
+if ! [ -z "$tree_depth" ]; then c3+=(-td "$tree_depth"); fi
+if ! [ -z "$row_sub" ]; then c3+=(-rs "$row_sub"); fi
 
 
 
 
 # running the scripts:
-echo "$c1"
-$c1
-echo "$c2"
-$c2
-echo "$c3"
-$c3
-echo "$c4"
-$c4
+echo "${c1[@]}"
+"${c1[@]}"
+echo "${c2[@]}"
+"${c2[@]}"
+echo "${c3[@]}"
+"${c3[@]}"
+echo "${c4[@]}"
+"${c4[@]}"
 
 
 s="stored all output as: "
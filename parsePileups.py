@@ -1,10 +1,9 @@
 import sys
 import os
 import pickle
+import gzip
 
-import pandas as pd
 import numpy as np
-from os.path import exists
 
 # this function parses paramaters passed in through the command line or sets them to a default vakue
 # paramaters:
@@ -39,8 +38,7 @@ def parseParams(args, start_dir):
             metadata_path = args[i + 1]
 
     # creating output_dir if it does not already exist:
-    if (exists(lists_dir) == False):
-        os.system("mkdir " + lists_dir)
+    os.makedirs(lists_dir, exist_ok=True)
 
     # exitting the script if the required parameter was not passed in
     if (metadata_path == ""):
@@ -212,15 +210,48 @@ def getMasked(p):
 def getPos(nuc_pos):
     return (nuc_pos - getMasked(nuc_pos))*6
 
+# returns the maximum length of a parsed list (without the Ct value)
+# follows the layout of parseFile for a pileup covering every position that is not masked: the list is padded with -1
+#   up to getPos(pos) and then the tuple of the position is added
+# getPos does not increase at the edges of the masked ranges (22897 is not masked but is counted by getMasked),
+#   so the length cannot be read off the last position alone
+def maxListLen():
+    list_len = 0
+    for pos in range(1, 29804):
+        if (isMasked(pos) == False):
+            list_len = max(list_len, getPos(pos)) + 6
+    return list_len
+
+# gets the genome id of a pileup file from its name (<genome_id>.gz, <genome_id>.pileup.gz or <genome_id>.pileup)
+# returns:
+#   the genome id, or None if the file does not have a pileup extension
+def getGenomeId(f):
+    if (f.endswith(".gz")):
+        f = f[:-len(".gz")]
+        if (f.endswith(".pileup")):
+            f = f[:-len(".pileup")]
+        return f
+    if (f.endswith(".pileup")):
+        return f[:-len(".pileup")]
+    return None
+
+# parses a pileup file and stores the parsed list (starting with the Ct value) in lists_dir as <genome_id>.pkl
+# also gathers quality control measures of the pileup file while parsing it
+# returns:
+#   qc: a dictionary of the mean and median read depth
 def parseFile(pileup_dir, pileup_file, met, meta_file, lists_dir, genome_id):
-    # reading through the pileup files
-    fi = open((pileup_dir + pileup_file), "r")
+    # reading through the pileup files, .gz files are decompressed while they are read
+    if (pileup_file.endswith(".gz")):
+        fi = gzip.open((pileup_dir + pileup_file), "rt")
+    else:
+        fi = open((pileup_dir + pileup_file), "r")
     if (met == True):
         ct  = getInfo(meta_file, genome_id)
     else:
         ct = None # no metadata info
 
     lst = []
+    depths = [] # the read depth of every position
     for aline in fi:
         vals = aline.split("\t")
 
@@ -232,6 +263,7 @@ def parseFile(pileup_dir, pileup_file, met, meta_file, lists_dir, genome_id):
                 nuc = vals[2] # the nucleotide at the position
                 dep = vals[3] # the read depth
                 res = vals[4] # the read results
+                depths.append(int(dep))
 
                 # parsing the read results, tup is a tuple of frequencies of [A, C, T, G, insertion, deletion] for this nucleotide position
                 tup = parseResults(res, nuc)
@@ -244,15 +276,25 @@ def parseFile(pileup_dir, pileup_file, met, meta_file, lists_dir, genome_id):
                 # adding the tuple of frequencies to the list
                 for item in tup:
                     lst.append(item)
+    fi.close()
+
+    qc = {}
+    if (len(depths) == 0):
+        qc["mean_depth"] = 0.0
+        qc["median_depth"] = 0.0
+    else:
+        depths = np.array(depths)
+        qc["mean_depth"] = float(depths.mean())
+        qc["median_depth"] = float(np.median(depths))
 
     # add the Ct value at the beginning of the list
     lst.insert(0, ct)
     # storing the list in the output directory
     out_f = (lists_dir + genome_id + ".pkl")
-    os.system("touch " + out_f)
     f_opn = open(out_f, "wb")
     pickle.dump(lst, (f_opn))
     f_opn.close()
+    return qc
 
 # main functions
 # parses all the pileup files in a directory and stores the parsed results as lists
@@ -268,37 +310,23 @@ def main(argv):
         meta_file = None
     else:
         met = True
+        # pandas is only imported when there is metadata to read, it is slow to import
+        import pandas as pd
         meta_file = pd.read_csv(metadata_path)
     c = 0 # track the number of files parsed
 
     print("--parsePileups.py-- started script, beginning to parse files")
     for filename in os.scandir(pileups_dir):
-        f = str(filename).strip("<DirEntry ' ''>")
+        f = filename.name
+        genome_id = getGenomeId(f)
         # checking that the file is the right format
-        if (f.endswith(".gz")):
-            genome_id = f.replace(".gz", "")
-   
-           if (genome_id.endswith(".pileup") == False):
-                pileup_file = genome_id + ".pileup"
-    
-           # unzip the file
-            os.system("gzip -d " + (pileups_dir + f))
-
-            parseFile(pileups_dir, pileup_file, met, meta_file, lists_dir, genome_id)
+        if (genome_id != None):
+            parseFile(pileups_dir, f, met, meta_file, lists_dir, genome_id)
             # printing updates every 100 files:
             if (c % 100 == 0):
                 print("\tparsed file: ", c)
             c = c + 1
 
-        elif (f.endswith(".pileup")):
-            genome_id = f.replace(".pileup", "")
-            parseFile(pileups_dir, (genome_id + ".pileup"), met, meta_file, lists_dir, genome_id)
-            # printing updates every 100 files:
-            if (c % 100 == 0):
-                print("\tparsed file: ", c)
-            c = c + 1
-
-
 
     print("--parsePileups.py-- finished script, stored output lists in: ", lists_dir)
 
@@ -0,0 +1,87 @@
+import numpy as np
+
+# quality control measures of parsed pileups, shared by trainModel.py (which stores the training statistics)
+#   and predictCt.py (which screens pileup files against them)
+# only numpy is imported so that predictCt.py stays quick to start
+
+
+# returns the path that the training feature statistics of a model are stored at, next to the model
+def statsName(model_name):
+    if (model_name.endswith(".pkl")):
+        model_name = model_name[:-len(".pkl")]
+    return model_name + "_stats.pkl"
+
+
+# calculates the fraction of the features of every row of a matrix that are missing (-1)
+# parameters:
+#   mat: the matrix, with the same columns as the matrix the model was trained on
+# returns:
+#   missing: the array of fractions, one per row
+def missingFraction(mat):
+    missing = np.empty(mat.shape[0])
+    for start in range(0, mat.shape[0], 256): # in chunks of rows to limit the memory used
+        missing[start:start + 256] = (mat[start:start + 256] == -1).mean(axis=1)
+    return missing
+
+
+# calculates the distance of every row of a matrix from the training feature distribution
+# the distance is the root mean square of the z-scores of the features of the row
+# parameters:
+#   mat: the matrix, with the same columns as the training matrix
+#   mean and std: the per-feature mean and standard deviation of the training matrix
+# returns:
+#   dists: the array of distances, one per row
+def featureDistance(mat, mean, std):
+    # features that barely vary in the training matrix would otherwise dominate the distance
+    scale = np.maximum(std, 0.01)
+    dists = np.empty(mat.shape[0])
+    for start in range(0, mat.shape[0], 256): # in chunks of rows to limit the memory used
+        z = (mat[start:start + 256] - mean) / scale
+        dists[start:start + 256] = np.sqrt((z * z).mean(axis=1))
+    return dists
+
+
+# calculates the summary statistics of the training matrix used to screen pileup files before prediction
+# the distances and missing fractions of the training rows are stored too, so that the thresholds can be recalculated at another percentile
+# parameters:
+#   mat: the training matrix
+#   percentile: the percentile of the training rows used as the thresholds
+# returns:
+#   stats: a dictionary of the per-feature mean and standard deviation, the distance from the feature distribution and the missing fraction
+#       of every training row, the percentile and the thresholds at that percentile
+def featureStats(mat, percentile):
+    r, c = mat.shape
+    total = np.zeros(c)
+    total_sq = np.zeros(c)
+    for start in range(0, r, 256): # in chunks of rows to limit the memory used
+        chunk = mat[start:start + 256]
+        total+=chunk.sum(axis=0)
+        total_sq+=(chunk * chunk).sum(axis=0)
+    mean = total / r
+    std = np.sqrt(np.maximum((total_sq / r) - (mean * mean), 0))
+
+    stats = {"mean": mean, "std": std, "percentile": percentile}
+    stats["dists"] = featureDistance(mat, mean, std)
+    stats["missing"] = missingFraction(mat)
+    stats["dist_threshold"] = float(np.percentile(stats["dists"], percentile))
+    stats["missing_threshold"] = float(np.percentile(stats["missing"], percentile))
+    return stats
+
+
+# gets the thresholds above which a pileup file fails quality control for a model
+# parameters:
+#   stats: the training statistics of the model returned by featureStats
+#   percentile: the percentile of the training rows to use, or None for the percentile the statistics were stored with
+#   missing_tolerance: the fraction of the features a pileup file may be missing regardless of the training rows,
+#       so that a model trained on fully covered genomes does not flag every pileup file missing a single position
+# returns:
+#   dist_threshold: the maximum distance from the training feature distribution
+#   missing_threshold: the maximum fraction of the features missing
+def qcThresholds(stats, percentile, missing_tolerance):
+    dist_threshold = stats["dist_threshold"]
+    missing_threshold = stats["missing_threshold"]
+    # statistics stored by older versions of trainModel.py only have the thresholds at the 99th percentile
+    if ((percentile != None) and ("dists" in stats)):
+        dist_threshold = float(np.percentile(stats["dists"], percentile))
+        missing_threshold = float(np.percentile(stats["missing"], percentile))
+    return dist_threshold, max(missing_threshold, missing_tolerance)
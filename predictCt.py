@@ -1,128 +1,495 @@
+import time
+start_time = time.perf_counter() # for --timings, started before the other imports
 import sys
 import os
-from os.path import exists
 import pickle
+import tempfile
+from collections import OrderedDict
 import numpy as np
 
+import parsePileups
+import pileupQC
+import_time = time.perf_counter() - start_time
+
 # this function parses paramaters passed in through the command line or sets them to a default vakue
 # paramaters:
 #   args: the list of arguments passed in through the command line
 #   start_dir: the directory from which the script was run
 # returns:
-#   pileups_path: the path to the pileup file to predict the Ct value of
-#   tmp_dir: the path to the temporary directory to be created by the script
-#   model_name: the path to the pileup model to use to predict the Ct value
+#   pileups_path: the path to the pileup file (or directory of pileup files) to predict the Ct value of
+#   tmp_dir: the directory in which to create the temporary directory, or None for the system default
+#   model_names: the list of paths to the pileup models to use to predict the Ct value
+#   memory_budget: the maximum number of bytes of models to keep loaded in memory at once
+#   results_name: the path of the .csv file to write the table of predictions to, or None to only print it
+#   quantiles: the list of quantiles of the per-tree predictions to report
+#   timings: whether to report the time spent importing modules versus the time spent working
+#   min_depth: the minimum median read depth of a pileup file to pass quality control
+#   qc_action: what to do with pileup files that fail quality control: "flag" or "skip"
+#   qc_percentile: the percentile of the training rows used as the quality control thresholds, or None for the one stored with each model
+#   missing_tolerance: the fraction of a model's features a pileup file may be missing regardless of the training rows
 def parseParams(args, start_dir):
     # required parameter:
     pileup_path = "" # (-i)
     # setting default values for each parameter:
-    tmp_dir = start_dir + "/tmp/" # (-t)
+    tmp_dir = None # (-t)
     out_dir = start_dir + "/output/" # (-o) # the ouput directory containing the matrix and model
-    model_name = out_dir + "pileup_model.pkl" # (-n)
+    models = ["pileup_model.pkl"] # (-n)
+    memory_budget = 2048 # (-mb) in MB
+    results_name = None # (-r)
+    quantiles = [0.05, 0.95] # (-q)
+    timings = False # (--timings)
+    min_depth = 10 # (-md)
+    qc_action = "flag" # (-qc)
+    qc_percentile = None # (-qp)
+    missing_tolerance = 0.01 # (-mt)
 
     for i in range(len(args)):
         if(args[i] == "-h" or args[i] == "--help"):
             print(helpOption())
             sys.exit()
+        if (args[i] == "--timings"):
+            timings = True
         if (i == len(args) - 1):
             break
         elif (args[i] == "-i" or args[i] == "--pileup_path"):
             pileup_path = args[i + 1]
         elif (args[i] == "-t" or args[i] == "--tmp_dir"):
             tmp_dir = args[i + 1]
-            if (tmp_dir.endswith("/") == False):
-                tmp_dir+="/"
         elif (args[i] == "-o" or args[i] == "--out_dir"):
             out_dir = args[i + 1]
             if (out_dir.endswith("/") == False):
                 out_dir = out_dir + "/"
-            model_name = out_dir + "pileup_model.pkl"
         elif (args[i] == "-n" or args[i] == "--model_name"):
-            model_name = out_dir + args[i + 1]
+            models = args[i + 1].split(",")
+        elif (args[i] == "-mb" or args[i] == "--memory_budget"):
+            memory_budget = float(args[i + 1])
+        elif (args[i] == "-r" or args[i] == "--results_name"):
+            results_name = args[i + 1]
+        elif (args[i] == "-q" or args[i] == "--quantiles"):
+            quantiles = [float(q) for q in args[i + 1].split(",")]
+        elif (args[i] == "-md" or args[i] == "--min_depth"):
+            min_depth = float(args[i + 1])
+        elif (args[i] == "-qc" or args[i] == "--qc_action"):
+            qc_action = args[i + 1]
+        elif (args[i] == "-qp" or args[i] == "--qc_percentile"):
+            qc_percentile = float(args[i + 1])
+        elif (args[i] == "-mt" or args[i] == "--missing_tolerance"):
+            missing_tolerance = float(args[i + 1])
 
+    # the model and results names are relative to the output directory
+    # a model passed in more than once is only scored once
+    model_names = []
+    for m in models:
+        if ((out_dir + m) not in model_names):
+            model_names.append(out_dir + m)
+    if (results_name != None):
+        results_name = out_dir + results_name
 
     # exitting the script if the required parameter was not passed in
     if (pileup_path == ""):
         print("Error: pileup_path (-i) required parameter not entered")
         sys.exit()
 
-    # exitting the script if the tmp_dir already exists
-    if (exists(tmp_dir)):
-        print("Error: tmp_dir (-t) already exists")
+    # exitting the script if a quantile is out of range, before any parsing or model loading
+    for q in quantiles:
+        if ((q < 0) or (q > 1)):
+            print("Error: quantiles (-q) must be between 0 and 1")
+            sys.exit()
+
+    if (qc_action not in ["flag", "skip"]):
+        print("Error: qc_action (-qc) must be one of: flag, skip")
+        sys.exit()
+
+    if ((qc_percentile != None) and ((qc_percentile < 0) or (qc_percentile > 100))):
+        print("Error: qc_percentile (-qp) must be between 0 and 100")
+        sys.exit()
+
+    if ((missing_tolerance < 0) or (missing_tolerance > 1)):
+        print("Error: missing_tolerance (-mt) must be between 0 and 1")
         sys.exit()
 
-    return pileup_path, tmp_dir, model_name
+    return pileup_path, tmp_dir, model_names, int(memory_budget * 1024 * 1024), results_name, quantiles, timings, min_depth, qc_action, qc_percentile, missing_tolerance
 
 # returns a string of all the options for the script if the script was called with -h or --help
 def helpOption():
-    s="-i --pileup_path:\tthe path to the pileup file to predict the Ct value of"
-    s+="-t --tmp_dir:\tthe path to the temporary directory to be created by the script"
-    s+="-n --model_path:\tthe path to the pileup model to use to predict the Ct value"
+    s="-i --pileup_path:\tthe path to the pileup file, or directory of pileup files, to predict the Ct value of"
+    s+="\n-t --tmp_dir:\tthe directory in which to create the script's temporary directory. It is created if it does not exist. The default is the system's temporary directory"
+    s+="\n-o --out_dir:\tthe directory in which the matrix and model are stored. The default is './output'"
+    s+="\n-n --model_name:\tthe name of the pileup model to use to predict the Ct value, or a comma-separated list of model names to score against all of them. The default is 'pileup_model.pkl'"
+    s+="\n-mb --memory_budget:\tthe maximum size (in MB) of models kept loaded in memory at once. The default is 2048"
+    s+="\n-r --results_name:\tthe name of the .csv file to write the table of predictions to. By default the table is only printed"
+    s+="\n-q --quantiles:\ta comma-separated list of the quantiles of the per-tree predictions to report. The default is '0.05,0.95'"
+    s+="\n-md --min_depth:\tthe minimum median read depth of a pileup file to pass quality control. The default is 10"
+    s+="\n-qc --qc_action:\twhat to do with pileup files that fail quality control: 'flag' them in the output or 'skip' their prediction. The default is 'flag'"
+    s+="\n-qp --qc_percentile:\tthe percentile of the training rows' distances from the feature distribution and missing fractions above which a pileup file fails quality control. The default is the percentile stored with each model by trainModel.py (99 unless changed)"
+    s+="\n-mt --missing_tolerance:\tthe fraction of a model's features a pileup file may be missing without failing quality control, even if the training rows were missing fewer. The default is 0.01"
+    s+="\n--timings:\treport the time spent importing modules versus the time spent parsing, loading models and scoring"
     return s
 
 
-# adjusts the length of the array representing the current pileup file to match the matrix the model was trained on
-#   by either adding -1 (the base isn't present in this genome) to the end or removing extra rows
+# keeps recently used models loaded in memory so that they are not unpickled again for every batch
+# the least recently used models are evicted once the total size of the loaded models exceeds the memory budget
+# the size of a model is estimated by the size of its pickle file, which is dominated by the arrays of its trees
+# a single run of the script loads every model once, the cache saves reloading models for callers that import this
+#   script and call scoreRows for one batch after another with model_cache
+class ModelCache:
+    def __init__(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.models = OrderedDict() # model path -> (model, size), ordered from least to most recently used
+        self.size = 0
+        self.load_time = 0 # total time spent unpickling models
+
+    # returns the model stored at model_name, loading it (and evicting older models) if it is not cached
+    def get(self, model_name):
+        if (model_name in self.models):
+            self.models.move_to_end(model_name)
+            return self.models[model_name][0]
+
+        size = os.path.getsize(model_name)
+        self.evict(size)
+
+        t = time.perf_counter()
+        model = pickle.load(open(model_name, "rb"))
+        self.load_time = self.load_time + (time.perf_counter() - t)
+        self.models[model_name] = (model, size)
+        self.size = self.size + size
+        return model
+
+    # changes the memory budget, evicting models if they no longer fit
+    def setBudget(self, memory_budget):
+        self.memory_budget = memory_budget
+        self.evict(0)
+
+    # evicts the least recently used models until a model of the given size fits in the budget
+    # a model bigger than the whole budget is still loaded, but only on its own
+    def evict(self, size):
+        while ((len(self.models) > 0) and (self.size + size > self.memory_budget)):
+            old_name, (old_model, old_size) = self.models.popitem(last=False)
+            self.size = self.size - old_size
+
+
+# the models loaded by this script, kept across calls to scoreRows
+model_cache = ModelCache(2048 * 1024 * 1024)
+
+
+# reads every parsed list file in the lists_dir directory into a matrix with one row per pileup file
+# rows shorter than the longest list are filled with -1 (the base isn't present in this genome)
 # parameters:
-#   row: the array of this current row
+#   lists_dir: the directory of pileup lists created by parsePileups.py
+# returns:
+#   genome_ids: the sorted list of genome ids corresponding to the order of rows in the matrix
+#   mat: the matrix of parsed pileup lists
+def loadRows(lists_dir):
+    genome_ids = []
+    lsts = []
+    for f in sorted(os.listdir(lists_dir)):
+        if (f.endswith(".pkl")): # checking that the file has the right extension
+            genome_ids.append(f.replace(".pkl", ""))
+            lst = pickle.load(open((lists_dir + f), "rb"))
+            del lst[0] # removing the Ct value (None, as there is no metadata)
+            lsts.append(lst)
+
+    max_len = max([len(l) for l in lsts], default=0)
+    mat = np.full((len(lsts), max_len), -1, dtype=np.float64)
+    for i in range(len(lsts)):
+        mat[i, :len(lsts[i])] = lsts[i]
+    return genome_ids, mat
+
+
+# adjusts the number of columns of the matrix representing the pileup files to match the matrix the model was trained on
+#   by either adding columns of -1 (the base isn't present in this genome) to the end or removing extra columns
+# parameters:
+#   mat: the matrix of the parsed pileup files, one row per file
 #   cols: the number of columns in the matrix the model was trained on
 # returns:
-#   row: the new array with the correct length
-def evenLength(row, cols):
-    if (cols == len(row)):
-        return row
-    if (cols > len(row)): # add -1 to end of row
-        diff = cols - len(row)
-        for i in range(diff):
-            row = np.append(row, -1)
-        return row
-    # delete extra values from row
-    diff = len(row) - cols
-    return row[:-diff]
+#   mat: the matrix with the correct number of columns
+def evenLength(mat, cols):
+    r, c = mat.shape
+    if (cols == c):
+        return mat
+    if (cols < c): # remove extra columns (a view, no copy is made)
+        return mat[:, :cols]
+    # add columns of -1 to the end of every row
+    even = np.full((r, cols), -1, dtype=mat.dtype)
+    even[:, :c] = mat
+    return even
+
+
+# gets the names of the models used in the output: the path of each model relative to the directory containing all of them,
+#   without the .pkl extension, so that models with the same file name in different directories get different names
+# parameters:
+#   model_names: the list of paths to the models
+# returns:
+#   labels: a dictionary of the model name -> name used in the output
+def modelLabels(model_names):
+    base_dir = os.path.commonpath([os.path.dirname(os.path.abspath(m)) for m in model_names])
+    labels = {}
+    for m in model_names:
+        labels[m] = os.path.relpath(os.path.abspath(m), base_dir).removesuffix(".pkl")
+    return labels
+
+
+# loads the training feature statistics stored next to a model by trainModel.py
+# returns:
+#   stats: the dictionary of statistics, or None if the model has no statistics file
+def loadStats(model_name):
+    stats_name = pileupQC.statsName(model_name)
+    if (os.path.exists(stats_name) == False):
+        return None
+    return pickle.load(open(stats_name, "rb"))
+
+
+# screens every row of the matrix before prediction
+# a row fails if its median read depth is below min_depth, or, for every model with training statistics,
+#   if the fraction of the model's features it is missing or its distance from the training feature distribution
+#   is above the thresholds returned by pileupQC.qcThresholds
+# parameters:
+#   mat: the matrix of the parsed pileup files, one row per file
+#   qcs: the list of quality control dictionaries returned by parsePileups.parseFile, one per row
+#   model_names: the list of paths to the models to score the rows against
+#   labels: the dictionary of model names used in the output returned by modelLabels
+#   min_depth: the minimum median read depth
+#   qc_percentile: the percentile of the training rows used as the thresholds, or None for the one stored with each model
+#   missing_tolerance: the fraction of a model's features a row may be missing regardless of the training rows
+# returns:
+#   missing: a dictionary of the model name -> array of the fractions of its features missing (nan if it has no statistics)
+#   dists: a dictionary of the model name -> array of distances from its training feature distribution (nan if it has no statistics)
+#   flags: a list with the list of reasons each row failed quality control
+def screenRows(mat, qcs, model_names, labels, min_depth, qc_percentile, missing_tolerance):
+    r = mat.shape[0]
+    flags = [[] for i in range(r)]
+    for i in range(r):
+        if (qcs[i]["median_depth"] < min_depth):
+            flags[i].append("depth")
+
+    missing = {}
+    dists = {}
+    for model_name in model_names:
+        stats = loadStats(model_name)
+        if (stats == None):
+            missing[model_name] = np.full(r, np.nan)
+            dists[model_name] = np.full(r, np.nan)
+            continue
+        # the statistics have one value per feature of the model
+        this_mat = evenLength(mat, len(stats["mean"]))
+        missing[model_name] = pileupQC.missingFraction(this_mat)
+        dists[model_name] = pileupQC.featureDistance(this_mat, stats["mean"], stats["std"])
+        dist_threshold, missing_threshold = pileupQC.qcThresholds(stats, qc_percentile, missing_tolerance)
+        for i in range(r):
+            if (missing[model_name][i] > missing_threshold):
+                flags[i].append(labels[model_name] + ":missing")
+            if (dists[model_name][i] > dist_threshold):
+                flags[i].append(labels[model_name] + ":drift")
+    return missing, dists, flags
+
+
+# gets the prediction of every tree in the forest for every row of the matrix in one pass over the trees
+# the trees are run in parallel threads for batches of more than one row, for a single row the threads would only add overhead
+# parameters:
+#   model: the random forest model
+#   mat: the matrix of the parsed pileup files, with the number of columns the model was trained on
+# returns:
+#   tree_preds: an array with one row of predictions per tree and one column per row of the matrix
+def predictTrees(model, mat):
+    # joblib is a dependency of sklearn, it is already imported once a model is loaded
+    from joblib import Parallel, delayed
+
+    # the trees predict on float32, converting once here instead of in every tree
+    X = np.ascontiguousarray(mat, dtype=np.float32)
+    trees = model.estimators_
+    tree_preds = np.empty((len(trees), X.shape[0]), dtype=np.float64)
+
+    def predictTree(j):
+        tree_preds[j] = trees[j].predict(X, check_input=False)
+
+    if (X.shape[0] == 1):
+        n_jobs = 1
+    else:
+        n_jobs = -1
+    Parallel(n_jobs=n_jobs, prefer="threads", require="sharedmem")(delayed(predictTree)(j) for j in range(len(trees)))
+    return tree_preds
+
+
+# predicts the Ct value of every row of the matrix with every model, along with the spread of the predictions across the trees
+# the point prediction is the mean of the trees (the same as model.predict) so it comes from the same pass as the spread
+# parameters:
+#   mat: the matrix of the parsed pileup files, one row per file
+#   model_names: the list of paths to the models to score the rows against
+#   cache: the ModelCache used to load the models
+#   quantiles: the list of quantiles of the per-tree predictions to compute
+# returns:
+#   preds: a dictionary of the model name -> (predictions, standard deviations, quantiles) with one value per row of the matrix
+#       (quantiles has one row per quantile)
+def scoreRows(mat, model_names, cache, quantiles):
+    preds = {}
+    for model_name in model_names:
+        model = cache.get(model_name)
+        this_mat = evenLength(mat, model.n_features_in_) # evening the length to the number of features in the model
+        tree_preds = predictTrees(model, this_mat)
+        preds[model_name] = (tree_preds.mean(axis=0), tree_preds.std(axis=0), np.quantile(tree_preds, quantiles, axis=0))
+    return preds
+
+
+# fills in the predictions of the rows that were skipped by quality control with nan
+# parameters:
+#   preds: the dictionary returned by scoreRows for the rows that were scored
+#   model_names: the list of paths to the models
+#   keep: the list of indices of the rows that were scored
+#   r: the total number of rows
+#   num_q: the number of quantiles
+# returns:
+#   preds: the dictionary of predictions with one value per row
+def expandPreds(preds, model_names, keep, r, num_q):
+    full = {}
+    for model_name in model_names:
+        p = np.full(r, np.nan)
+        std = np.full(r, np.nan)
+        qs = np.full((num_q, r), np.nan)
+        if (model_name in preds):
+            p[keep] = preds[model_name][0]
+            std[keep] = preds[model_name][1]
+            qs[:, keep] = preds[model_name][2]
+        full[model_name] = (p, std, qs)
+    return full
+
+
+# writes the table of predictions with one row per pileup file
+# every pileup file has columns for its quality control measures and every model has a column for the prediction,
+#   the standard deviation across trees, each quantile across trees, the fraction of its features missing
+#   and the distance from its training feature distribution
+# parameters:
+#   genome_ids: the list of genome ids corresponding to the order of the predictions
+#   preds: the dictionary returned by scoreRows
+#   quantiles: the list of quantiles used for scoreRows
+#   qcs: the list of quality control dictionaries, one per row
+#   missing, dists and flags: the missing fractions, distances and reasons for failing quality control returned by screenRows
+#   labels: the dictionary of model names used in the output returned by modelLabels
+#   sep: the string used to separate the columns
+# returns:
+#   s: the table as a string
+def makeTable(genome_ids, preds, quantiles, qcs, missing, dists, flags, labels, sep):
+    names = list(preds.keys())
+    header = ["genome_id", "median_depth", "qc"]
+    for n in names:
+        label = labels[n]
+        header+=[label, label + "_std"] + [(label + "_q" + str(q)) for q in quantiles] + [label + "_missing", label + "_dist"]
+    s = sep.join(header)
+    for i in range(len(genome_ids)):
+        row = [genome_ids[i], str(qcs[i]["median_depth"]), qcResult(flags[i])]
+        for n in names:
+            p, std, qs = preds[n]
+            row+=[str(p[i]), str(std[i])] + [str(qs[j][i]) for j in range(len(quantiles))] + [str(missing[n][i]), str(dists[n][i])]
+        s+="\n" + sep.join(row)
+    return s + "\n"
+
+
+# returns the quality control result of a row as a string: "pass" or the reasons it failed
+def qcResult(flags):
+    if (len(flags) == 0):
+        return "pass"
+    return ";".join(flags)
 
 
 # main function
-# parses the passed in pileup file and predicts its Ct value using the pileup model
+# parses the passed in pileup file(s) and predicts their Ct values using the pileup model(s)
 def main(argv):
     args = sys.argv
     start_dir = os.getcwd() # current directory
-    script_path = os.path.dirname(os.path.realpath(argv[0])) # directory of the script
-    if (script_path.endswith("/") == False):
-        script_path+="/"
 
     # set parameters:
-    pileup_path, tmp_dir, model_name  = parseParams(args, start_dir)
+    pileup_path, tmp_dir, model_names, memory_budget, results_name, quantiles, timings, min_depth, qc_action, qc_percentile, missing_tolerance = parseParams(args, start_dir)
     print("--predictCt.py-- set parameters")
+    t_start = time.perf_counter()
+
+    # getting the pileup file(s) to parse
+    if (os.path.isdir(pileup_path)):
+        pileup_dir = os.path.join(pileup_path, "")
+        pileup_files = sorted(os.listdir(pileup_dir))
+    else:
+        pileup_dir = os.path.join(os.path.dirname(pileup_path), "")
+        pileup_files = [os.path.basename(pileup_path)]
+    pileup_files = [f for f in pileup_files if (parsePileups.getGenomeId(f) != None)]
+
+    # exitting the script if there are no pileup files to parse
+    if (len(pileup_files) == 0):
+        print("Error: pileup_path (-i) must be a .gz or .pileup file or a directory containing them")
+        sys.exit()
 
-    # creating the temporary directory to store the pileup file
-    os.system("mkdir " + tmp_dir)
-    os.system("cp " + pileup_path + " " + tmp_dir)
+    # creating the directory for the temporary directory if it does not already exist:
+    if (tmp_dir != None):
+        os.makedirs(tmp_dir, exist_ok=True)
 
-    # parse the pileup file and create an array to represent the genome:
-    arr_name = "this_row.npy"
-    os.system("python3 " + script_path + "parsePileups.py -p " + tmp_dir + " -l " + tmp_dir + " -d None")
-    os.system("python3 " + script_path + "createMat.py -l " + tmp_dir + " -o " + tmp_dir + " -m " + arr_name)
+    # parse the pileup file(s) once into a temporary directory and create a matrix to represent the genomes
+    # the temporary directory has a unique name and is removed even if parsing fails
+    with tempfile.TemporaryDirectory(dir=tmp_dir) as lists_dir:
+        lists_dir = os.path.join(lists_dir, "")
+        qc_by_id = {}
+        for f in pileup_files:
+            genome_id = parsePileups.getGenomeId(f)
+            qc_by_id[genome_id] = parsePileups.parseFile(pileup_dir, f, False, None, lists_dir, genome_id)
+        genome_ids, mat = loadRows(lists_dir)
+    qcs = [qc_by_id[g] for g in genome_ids]
+    print("--predictCt.py-- parsed pileup file(s)")
 
-    # loading the model
-    model = pickle.load(open(model_name, "rb"))
+    # screening the pileup files before prediction:
+    labels = modelLabels(model_names)
+    missing, dists, flags = screenRows(mat, qcs, model_names, labels, min_depth, qc_percentile, missing_tolerance)
+    if (qc_action == "skip"):
+        keep = [i for i in range(len(genome_ids)) if (len(flags[i]) == 0)]
+        print("--predictCt.py-- skipped ", (len(genome_ids) - len(keep)), " pileup file(s) that failed quality control")
+    else:
+        keep = list(range(len(genome_ids)))
+    t_parsed = time.perf_counter()
 
-    # get the number of features in the model:
-    num_ft = model.n_features_in_ 
+    # unpickling the forest models imports sklearn.ensemble, importing it here first (with or without --timings)
+    #   so that its import time is measured apart from loading the models without changing what a run does
+    import sklearn.ensemble
+    t_sklearn = time.perf_counter()
 
-    # open array representing this pileup
-    arr = (np.load((tmp_dir + arr_name), allow_pickle=True))[0]
-    this_row = evenLength(arr, num_ft) # evening the length
-    print("--predictCt.py-- parsed pileup file")
+    # making predictions with every model:
+    cache = model_cache
+    cache.setBudget(memory_budget)
+    load_start = cache.load_time
+    if (len(keep) == len(genome_ids)):
+        preds = scoreRows(mat, model_names, cache, quantiles)
+    elif (len(keep) > 0):
+        preds = expandPreds(scoreRows(mat[keep], model_names, cache, quantiles), model_names, keep, len(genome_ids), len(quantiles))
+    else:
+        preds = expandPreds({}, model_names, keep, len(genome_ids), len(quantiles))
+    print("--predictCt.py-- got prediction(s)")
+    t_scored = time.perf_counter()
 
-    # removing the temporary directory:
-    os.system("rm -r " + tmp_dir)
+    # printing prediction(s):
+    if ((len(genome_ids) == 1) and (len(model_names) == 1)):
+        p, std, qs = preds[model_names[0]]
+        print("\nPredicted Ct value: ", p[0])
+        print("Standard deviation across trees: ", std[0])
+        for j in range(len(quantiles)):
+            print("Quantile " + str(quantiles[j]) + " across trees: ", qs[j][0])
+        print("Fraction of missing features: ", missing[model_names[0]][0])
+        print("Median read depth: ", qcs[0]["median_depth"])
+        print("Distance from training features: ", dists[model_names[0]][0])
+        print("Quality control: ", qcResult(flags[0]))
+    else:
+        print("\n" + makeTable(genome_ids, preds, quantiles, qcs, missing, dists, flags, labels, "\t"))
 
-    # making prediction:
-    p = (model.predict(this_row.reshape(1, -1)))[0]
-    print("--predictCt.py-- got prediction")
+    if (results_name != None):
+        f = open(results_name, "w")
+        f.write(makeTable(genome_ids, preds, quantiles, qcs, missing, dists, flags, labels, ","))
+        f.close()
+        print("--predictCt.py-- stored predictions as: ", results_name)
 
-    # printing prediction:
-    print("\nPredicted Ct value: ", p)
+    if (timings):
+        sklearn_time = t_sklearn - t_parsed
+        work_time = (t_parsed - t_start) + (t_scored - t_sklearn)
+        print("\n--predictCt.py-- timings (seconds):")
+        print("\timporting modules: ", import_time)
+        print("\timporting sklearn: ", sklearn_time)
+        print("\tparsing: ", (t_parsed - t_start))
+        load_time = cache.load_time - load_start
+        print("\tloading models: ", load_time)
+        print("\tscoring: ", (t_scored - t_sklearn - load_time))
+        print("\ttotal import time: ", (import_time + sklearn_time), "  total work time: ", work_time)
 
 
 # if this is the script called by python, run main function
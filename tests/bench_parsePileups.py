@@ -0,0 +1,69 @@
+import os
+import sys
+import gzip
+import shutil
+import tempfile
+import time
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parsePileups
+
+# times parsing compressed pileup files the way parsePileups.py used to (decompressing every file with 'gzip -d' and
+#   creating its list file with 'touch', each in a shell) and the way it does now (reading the file through gzip.open)
+# the files are full length synthetic pileups, the parsing itself is the same in both, so the difference is the per-file overhead
+# run from the repo directory with:
+#   python3 tests/bench_parsePileups.py [number of files, default 10]
+
+
+# writes a compressed pileup file with a read at every position of the genome
+def writePileup(path):
+    f = gzip.open(path, "wt")
+    for pos in range(1, 29904):
+        f.write("MN908947.3\t" + str(pos) + "\tA\t20\t..........,,,,,,,,,C\tIIIIIIIIIIIIIIIIIIII\n")
+    f.close()
+
+
+# parses a compressed pileup file with the steps of the earlier version of parsePileups.py
+# the compressed file is replaced by the decompressed one, as 'gzip -d' did
+def parseBefore(pileup_dir, f, lists_dir, genome_id):
+    os.system("gzip -d " + (pileup_dir + f))
+    os.system("touch " + (lists_dir + genome_id + ".pkl"))
+    parsePileups.parseFile(pileup_dir, genome_id + ".pileup", False, None, lists_dir, genome_id)
+
+
+def main():
+    num_files = 10
+    if (len(sys.argv) > 1):
+        num_files = int(sys.argv[1])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        src_dir = tmp + "/src/"
+        pileup_dir = tmp + "/pileups/"
+        lists_dir = tmp + "/lists/"
+        for d in [src_dir, pileup_dir, lists_dir]:
+            os.makedirs(d)
+        for i in range(num_files):
+            writePileup(src_dir + "G" + str(i) + ".pileup.gz")
+
+        before = []
+        after = []
+        for i in range(num_files):
+            f = "G" + str(i) + ".pileup.gz"
+            genome_id = parsePileups.getGenomeId(f)
+            shutil.copy(src_dir + f, pileup_dir + f) # not timed, 'gzip -d' replaces the file
+            t = time.perf_counter()
+            parseBefore(pileup_dir, f, lists_dir, genome_id)
+            before.append(time.perf_counter() - t)
+
+            t = time.perf_counter()
+            parsePileups.parseFile(src_dir, f, False, None, lists_dir, genome_id)
+            after.append(time.perf_counter() - t)
+
+    print("seconds per file, median of", num_files, "files:")
+    print("\tbefore (gzip -d and touch):", round(float(np.median(before)), 4))
+    print("\tafter (gzip.open):", round(float(np.median(after)), 4))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+import os
+import sys
+import pickle
+import numpy as np
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parsePileups
+import createMat
+
+
+# writes a pileup file with a read at every position from first to last
+def writePileup(path, first, last):
+    f = open(path, "w")
+    for pos in range(first, last + 1):
+        f.write("MN908947.3\t" + str(pos) + "\tA\t20\t..........,,,,,,,,,C\tIIIIIIIIIIIIIIIIIIII\n")
+    f.close()
+
+
+# parses a full coverage pileup and a shorter one and builds the matrix with 1 and 2 workers
+def test_full_coverage_matrix(tmp_path):
+    pileup_dir = str(tmp_path / "pileups") + "/"
+    lists_dir = str(tmp_path / "lists") + "/"
+    os.makedirs(pileup_dir)
+    os.makedirs(lists_dir)
+    writePileup(pileup_dir + "full.pileup", 1, 29903)
+    writePileup(pileup_dir + "short.pileup", 1, 20000)
+    for f in ["full.pileup", "short.pileup"]:
+        parsePileups.parseFile(pileup_dir, f, False, None, lists_dir, parsePileups.getGenomeId(f))
+
+    full_len = len(pickle.load(open(lists_dir + "full.pkl", "rb"))) - 1
+    assert full_len == parsePileups.maxListLen()
+
+    mats = []
+    for workers in [1, 2]:
+        mat_name = str(tmp_path / ("mat_" + str(workers) + ".npy"))
+        genome_ids, cts = createMat.makeArray(lists_dir, mat_name, workers)
+        assert genome_ids == ["full", "short"]
+        assert cts == [None, None]
+        mat = np.load(mat_name)
+        assert mat.shape == (2, full_len)
+        # the shorter genome is padded with -1
+        short_len = len(pickle.load(open(lists_dir + "short.pkl", "rb"))) - 1
+        assert (mat[1, short_len:] == -1).all()
+        mats.append(open(mat_name, "rb").read())
+
+    # the matrix is the same regardless of the number of workers
+    assert mats[0] == mats[1]
+
+
+# when every genome is shorter than the longest possible list, the matrix is narrowed to the longest genome
+def test_narrowed_matrix(tmp_path):
+    pileup_dir = str(tmp_path / "pileups") + "/"
+    lists_dir = str(tmp_path / "lists") + "/"
+    os.makedirs(pileup_dir)
+    os.makedirs(lists_dir)
+    writePileup(pileup_dir + "a.pileup", 1, 15000)
+    writePileup(pileup_dir + "b.pileup", 200, 20000)
+    for f in ["a.pileup", "b.pileup"]:
+        parsePileups.parseFile(pileup_dir, f, False, None, lists_dir, parsePileups.getGenomeId(f))
+    b_len = len(pickle.load(open(lists_dir + "b.pkl", "rb"))) - 1
+
+    mats = []
+    for workers in [1, 2]:
+        mat_name = str(tmp_path / ("mat_" + str(workers) + ".npy"))
+        createMat.makeArray(lists_dir, mat_name, workers)
+        assert np.load(mat_name).shape == (2, b_len)
+        assert os.path.exists(mat_name + ".tmp") == False
+        mats.append(open(mat_name, "rb").read())
+    assert mats[0] == mats[1]
+
+
+# a list longer than the longest possible list fails the build without leaving the scratch file behind
+def test_failed_build_removes_scratch(tmp_path):
+    lists_dir = str(tmp_path / "lists") + "/"
+    os.makedirs(lists_dir)
+    pickle.dump([None] + [0.0] * (parsePileups.maxListLen() + 6), open(lists_dir + "long.pkl", "wb"))
+
+    mat_name = str(tmp_path / "mat.npy")
+    with pytest.raises(ValueError):
+        createMat.makeArray(lists_dir, mat_name, 1)
+    assert os.path.exists(mat_name + ".tmp") == False
+    assert os.path.exists(mat_name) == False
@@ -0,0 +1,44 @@
+import os
+import sys
+import gzip
+import pickle
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import parsePileups
+
+
+# the lines of a pileup file with a read at every position from first to last
+def pileupLines(first, last):
+    return "".join(["MN908947.3\t" + str(pos) + "\tA\t20\t..........,,,,,,,,,C\tIIIIIIIIIIIIIIIIIIII\n" for pos in range(first, last + 1)])
+
+
+def test_genome_id():
+    assert parsePileups.getGenomeId("G1.gz") == "G1"
+    assert parsePileups.getGenomeId("G1.pileup.gz") == "G1"
+    assert parsePileups.getGenomeId("G1.pileup") == "G1"
+    assert parsePileups.getGenomeId("G1.csv") == None
+
+
+# a compressed pileup is read as it is decompressed (without changing the file) and gives the same list as the plain pileup
+def test_parse_gz_and_pileup(tmp_path):
+    pileup_dir = str(tmp_path / "pileups") + "/"
+    lists_dir = str(tmp_path / "lists") + "/"
+    os.makedirs(pileup_dir)
+    os.makedirs(lists_dir)
+    lines = pileupLines(100, 400)
+    open(pileup_dir + "plain.pileup", "w").write(lines)
+    for f in ["short.gz", "long.pileup.gz"]:
+        fi = gzip.open(pileup_dir + f, "wt")
+        fi.write(lines)
+        fi.close()
+
+    for f in ["plain.pileup", "short.gz", "long.pileup.gz"]:
+        qc = parsePileups.parseFile(pileup_dir, f, False, None, lists_dir, parsePileups.getGenomeId(f))
+        assert qc == {"mean_depth": 20.0, "median_depth": 20.0}
+    assert sorted(os.listdir(pileup_dir)) == ["long.pileup.gz", "plain.pileup", "short.gz"]
+
+    plain = pickle.load(open(lists_dir + "plain.pkl", "rb"))
+    assert plain[0] == None # no metadata
+    assert len(plain) > 1
+    for genome_id in ["short", "long"]:
+        assert pickle.load(open(lists_dir + genome_id + ".pkl", "rb")) == plain
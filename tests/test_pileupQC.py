@@ -0,0 +1,56 @@
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import pileupQC
+
+
+# a training matrix of 100 fully covered rows of 50 features, from the same distribution
+def trainingMat():
+    return np.random.default_rng(0).normal(0.5, 0.1, (100, 50))
+
+
+def test_missing_fraction():
+    mat = np.zeros((300, 4)) # more rows than one chunk
+    mat[0, :2] = -1
+    mat[299, :] = -1
+    missing = pileupQC.missingFraction(mat)
+    assert missing.shape == (300,)
+    assert missing[0] == 0.5
+    assert missing[299] == 1
+    assert (missing[1:299] == 0).all()
+
+
+def test_feature_distance():
+    mean = np.array([0.0, 1.0])
+    std = np.array([1.0, 0.0]) # a constant feature is scaled by 0.01, not divided by 0
+    mat = np.array([[0.0, 1.0], [3.0, 1.0], [0.0, 1.02]])
+    dists = pileupQC.featureDistance(mat, mean, std)
+    assert np.allclose(dists, [0, np.sqrt(4.5), np.sqrt(2)])
+
+
+def test_feature_stats():
+    mat = trainingMat()
+    stats = pileupQC.featureStats(mat, 95)
+    assert np.allclose(stats["mean"], mat.mean(axis=0))
+    assert np.allclose(stats["std"], mat.std(axis=0))
+    assert stats["percentile"] == 95
+    assert stats["dists"].shape == (100,) and stats["missing"].shape == (100,)
+    assert stats["dist_threshold"] == np.percentile(stats["dists"], 95)
+    assert stats["missing_threshold"] == 0 # the training rows are fully covered
+
+
+def test_qc_thresholds():
+    stats = pileupQC.featureStats(trainingMat(), 99)
+    dist_threshold, missing_threshold = pileupQC.qcThresholds(stats, None, 0.01)
+    assert dist_threshold == stats["dist_threshold"]
+    assert missing_threshold == 0.01 # the tolerance applies when the training rows miss fewer features
+
+    dist_threshold, missing_threshold = pileupQC.qcThresholds(stats, 50, 0)
+    assert dist_threshold == np.percentile(stats["dists"], 50)
+    assert dist_threshold < stats["dist_threshold"]
+
+    # statistics stored without the training distributions keep their thresholds
+    old_stats = {"dist_threshold": 2.0, "missing_threshold": 0.1}
+    assert pileupQC.qcThresholds(old_stats, 50, 0.01) == (2.0, 0.1)
@@ -0,0 +1,146 @@
+import os
+import sys
+import pickle
+import numpy as np
+from sklearn.ensemble import RandomForestRegressor
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+import predictCt
+import pileupQC
+
+
+# fits a small random forest on random data with the given number of features
+def fitModel(num_ft):
+    rng = np.random.default_rng(0)
+    X = rng.random((60, num_ft))
+    y = X[:, 0] * 10 + rng.random(60)
+    return RandomForestRegressor(n_estimators=25, max_samples=0.5, random_state=0).fit(X, y)
+
+
+# the mean of the trees is the prediction of the forest, for a single row (one thread) and for a batch (threads across trees)
+def test_tree_mean_matches_predict():
+    model = fitModel(20)
+    rng = np.random.default_rng(1)
+    for rows in [1, 10]:
+        mat = rng.random((rows, 20))
+        tree_preds = predictCt.predictTrees(model, mat)
+        assert tree_preds.shape == (25, rows)
+        assert np.allclose(tree_preds.mean(axis=0), model.predict(mat), rtol=0, atol=1e-12)
+
+
+# scoreRows returns the prediction, standard deviation and quantiles of every model for every row
+def test_score_rows_shapes(tmp_path):
+    model = fitModel(20)
+    model_name = str(tmp_path / "model.pkl")
+    pickle.dump(model, open(model_name, "wb"))
+    mat = np.random.default_rng(2).random((7, 23)) # wider than the model, evened to 20 columns
+
+    quantiles = [0.05, 0.5, 0.95]
+    preds = predictCt.scoreRows(mat, [model_name], predictCt.ModelCache(10**9), quantiles)
+    p, std, qs = preds[model_name]
+    assert p.shape == (7,)
+    assert std.shape == (7,)
+    assert qs.shape == (3, 7)
+    assert np.allclose(p, model.predict(mat[:, :20]), rtol=0, atol=1e-12)
+    assert (std >= 0).all()
+    assert (qs[0] <= qs[1]).all() and (qs[1] <= qs[2]).all()
+
+
+# pickles an object to a file in tmp_path and returns the path and the size of the file
+def pickleModel(tmp_path, name, obj):
+    model_name = str(tmp_path / name)
+    pickle.dump(obj, open(model_name, "wb"))
+    return model_name, os.path.getsize(model_name)
+
+
+# the least recently used model is evicted first, using a model moves it to the end
+def test_cache_lru_order(tmp_path):
+    a, size = pickleModel(tmp_path, "a.pkl", [0.0] * 100)
+    b, size = pickleModel(tmp_path, "b.pkl", [1.0] * 100)
+    c, size = pickleModel(tmp_path, "c.pkl", [2.0] * 100)
+    cache = predictCt.ModelCache(2 * size)
+
+    cache.get(a)
+    cache.get(b)
+    assert cache.get(a) == [0.0] * 100 # a is now the most recently used
+    cache.get(c) # evicts b
+    assert list(cache.models.keys()) == [a, c]
+    assert cache.size == 2 * size
+
+
+# models are evicted until a new model fits the budget, a model bigger than the budget is kept on its own
+def test_cache_eviction_budget(tmp_path):
+    small, small_size = pickleModel(tmp_path, "small.pkl", [0] * 10)
+    big, big_size = pickleModel(tmp_path, "big.pkl", [1.0] * 10000)
+    cache = predictCt.ModelCache(big_size - 1)
+
+    cache.get(small)
+    cache.get(big)
+    assert list(cache.models.keys()) == [big]
+    assert cache.size == big_size
+
+    cache.get(small)
+    assert list(cache.models.keys()) == [small]
+    assert cache.size == small_size
+
+
+# shrinking the budget evicts the least recently used models until the rest fit
+def test_cache_set_budget(tmp_path):
+    names = [pickleModel(tmp_path, str(i) + ".pkl", [float(i)] * 100)[0] for i in range(3)]
+    size = os.path.getsize(names[0])
+    cache = predictCt.ModelCache(3 * size)
+    for m in names:
+        cache.get(m)
+    assert len(cache.models) == 3
+
+    cache.setBudget(size)
+    assert list(cache.models.keys()) == [names[2]]
+    assert cache.size == size
+    cache.setBudget(0)
+    assert len(cache.models) == 0 and cache.size == 0
+
+
+# rows are cut to the width of the model or padded with -1 up to it
+def test_even_length():
+    mat = np.arange(12, dtype=np.float64).reshape(3, 4)
+    assert predictCt.evenLength(mat, 4) is mat
+    assert np.array_equal(predictCt.evenLength(mat, 2), mat[:, :2])
+
+    even = predictCt.evenLength(mat, 6)
+    assert even.shape == (3, 6)
+    assert np.array_equal(even[:, :4], mat)
+    assert (even[:, 4:] == -1).all()
+
+
+# a row shifted away from the training distribution is flagged for drift, a row missing a tenth of the model's features
+#   is flagged for missing coverage, and a row with a low median read depth is flagged for depth
+def test_screen_rows(tmp_path):
+    rng = np.random.default_rng(3)
+    train = rng.normal(0.5, 0.1, (100, 50))
+    model_name = str(tmp_path / "model.pkl")
+    pickle.dump(pileupQC.featureStats(train, 99), open(pileupQC.statsName(model_name), "wb"))
+
+    mat = rng.normal(0.5, 0.1, (4, 50))
+    mat[1] = mat[1] + 1 # drift
+    mat[2, 45:] = -1 # missing coverage
+    qcs = [{"median_depth": 30}, {"median_depth": 30}, {"median_depth": 30}, {"median_depth": 2}]
+    labels = {model_name: "model"}
+
+    missing, dists, flags = predictCt.screenRows(mat, qcs, [model_name], labels, 10, None, 0.01)
+    assert flags == [[], ["model:drift"], ["model:missing", "model:drift"], ["depth"]]
+    assert np.allclose(missing[model_name], [0, 0, 0.1, 0])
+    assert dists[model_name][1] > 5
+
+    # with a missing tolerance above the missing fraction only the distance of the row fails
+    missing, dists, flags = predictCt.screenRows(mat, qcs, [model_name], labels, 10, None, 0.2)
+    assert flags[2] == ["model:drift"]
+
+
+# models without training statistics are only screened for read depth
+def test_screen_rows_no_stats(tmp_path):
+    model_name = str(tmp_path / "model.pkl")
+    mat = np.zeros((2, 5))
+    qcs = [{"median_depth": 30}, {"median_depth": 2}]
+    missing, dists, flags = predictCt.screenRows(mat, qcs, [model_name], {model_name: "model"}, 10, None, 0.01)
+    assert flags == [[], ["depth"]]
+    assert np.isnan(missing[model_name]).all() and np.isnan(dists[model_name]).all()
@@ -6,6 +6,8 @@ import numpy as np
 
 from sklearn.ensemble import RandomForestRegressor
 
+import pileupQC
+
 # for model evaluation:
 from sklearn.metrics import r2_score
 from sklearn.metrics import mean_squared_error
@@ -21,10 +23,12 @@ import math
 #   mat_name: the name of the pileup matrix
 #   ct_name: the name of the ordered list of Ct values
 #   out_file: the name of the file to which to write the output of the script
-#   model_name: the name that the model trained in the first fold will be stored as
+#   model_name: the name that the model trained on all the data will be stored as
 #   num_trees: the number of trees ('n_estimators' parameter for the model)
 #   tree_depth: the value for tree depth  ('max_depth parameter for the model)
 #   row_subsampling: the value for row subsampling ('max_samples' parameter for the model)
+#   eval_mode: how to evaluate the model: "cv" (5 fold cross validation), "oob" (out-of-bag predictions of one model) or "both"
+#   qc_percentile: the percentile of the training rows stored as the quality control thresholds for predictCt.py
 def parseParams(args, start_dir):
     # setting default values for each parameter:
     out_dir = start_dir + "/output/" # (-o)
@@ -36,6 +40,8 @@ def parseParams(args, start_dir):
     num_trees = 400 # (-nt)
     tree_depth = None # (-td)
     row_subsampling = 0.25 # (-rs)
+    eval_mode = "cv" # (-e)
+    qc_percentile = 99 # (-qp)
 
 
     for i in range(len(args)):
@@ -61,50 +67,57 @@ def parseParams(args, start_dir):
         elif (args[i] == "-n" or args[i] == "--model_name"):
             model_name = out_dir + args[i + 1]
         elif( args[i] == "-nt" or args[i] == "--num_trees"):
-            num_trees = args[i + 1]
+            num_trees = int(args[i + 1])
         elif( args[i] == "-td" or args[i] == "--tree_depth"):
-            tree_depth = args[i + 1]
+            if (args[i + 1] != "None"):
+                tree_depth = int(args[i + 1])
         elif( args[i] == "-rs" or args[i] == "--row_subsampling"):
-            row_subsampling = args[i + 1]
+            row_subsampling = float(args[i + 1])
+        elif( args[i] == "-e" or args[i] == "--eval_mode"):
+            eval_mode = args[i + 1]
+        elif( args[i] == "-qp" or args[i] == "--qc_percentile"):
+            qc_percentile = float(args[i + 1])
+
+    if (eval_mode not in ["cv", "oob", "both"]):
+        print("Error: eval_mode (-e) must be one of: cv, oob, both")
+        sys.exit()
+
+    if ((qc_percentile < 0) or (qc_percentile > 100)):
+        print("Error: qc_percentile (-qp) must be between 0 and 100")
+        sys.exit()
 
-    os.system("touch " + out_file)
+    open(out_file, "a").close() # checking that the output file can be written before training
 
-    return out_dir, mat_name, ct_name, out_file, model_name, num_trees, tree_depth, row_subsampling
+    return out_dir, mat_name, ct_name, out_file, model_name, num_trees, tree_depth, row_subsampling, eval_mode, qc_percentile
 
 
 # returns a string of all the options for the script if the script was called with -h or --help
 def helpOption():
     s="-o --out_dir:\tthe directory in which to store outputs from the script. The default is './output'"
-    s= "\n-m --mat_name:\tthe name of the pileup matrix. The default is 'pileup_matrix.npy'"
+    s+="\n-m --mat_name:\tthe name of the pileup matrix. The default is 'pileup_matrix.npy'"
     s+="\n-c --ct_name:\tthe name of the ordered list of Ct values. The default is 'pileup_cts.pkl'"
     s+="\n-f --out_file:\tthe name of the file to which to write the output of the script. The default is 'pileup_model_output'"
-    s+="\n-n --model_name:\tthe name that the model trained in the first fold will be stored as. The default is 'pileup_model.pkl'"
+    s+="\n-n --model_name:\tthe name that the model trained on all the data will be stored as. The default is 'pileup_model.pkl'"
     s+="\n-nt --num_trees:\tthe 'n_estimators' (number of trees) parameter in the Random Forest regressor. The default is 400"
     s+="\n-td --tree_depth:\tthe 'max_depth' (tree depth) parameter in the Random Forest regressor. The default is None"
     s+="\n-rs --row_subsampling:\tthe 'max_samples' parameter in the Random Forest regressor. the default is 0.25"
+    s+="\n-e --eval_mode:\thow to evaluate the model: 'cv' (5 fold cross validation), 'oob' (out-of-bag predictions from a single fit) or 'both'. The default is 'cv'"
+    s+="\n-qp --qc_percentile:\tthe percentile of the training rows' distances from the feature distribution and missing fractions stored as the quality control thresholds used by predictCt.py. The default is 99"
 
     return s
 
 
 
-# splits the matrix into train and test sets
-# splits using indices based on the fold so that test sets across folds are non-overlapping
+# gets the train and test indices of a fold so that test sets across folds are non-overlapping
 # parameters:
-#   mat: the matrix to split into train and test sets
-#   ct_lst: the ordered list of Ct values corresponding to the order of rows in the matrix
 #   inds: the randomly shuffled list of all indices in the matrix
 #   num_folds: the total number of num_folds
 #   i: the index of the current fold
 # returns:
-#   train_set and test_set: the train and test sections of the matrix
-#   train_cts and test_cts: the train and test sections of the Ct value list corresponding to the rows of the train and test sets
-
-def splitMat(mat, ct_lst, inds, num_folds, i):
-    r, c = mat.shape
-
-    # getting the test and train indices for this fold
-    ts = int(r/num_folds)
-    if (i == 4):
+#   train_inds and test_inds: the sorted lists of indices of the train and test sets
+def foldInds(inds, num_folds, i):
+    ts = int(len(inds)/num_folds)
+    if (i == num_folds - 1):
         test_inds = inds[(i*ts):]
     else:
         test_inds = inds[(i*ts):((i + 1)*ts)]
@@ -116,6 +129,24 @@ def splitMat(mat, ct_lst, inds, num_folds, i):
     # sorting the indices so that they correspond to the same order in the ct and mcov lists
     train_inds.sort()
     test_inds.sort()
+    return train_inds, test_inds
+
+
+# splits the matrix into train and test sets
+# splits using indices based on the fold so that test sets across folds are non-overlapping
+# parameters:
+#   mat: the matrix to split into train and test sets
+#   ct_lst: the ordered list of Ct values corresponding to the order of rows in the matrix
+#   inds: the randomly shuffled list of all indices in the matrix
+#   num_folds: the total number of num_folds
+#   i: the index of the current fold
+# returns:
+#   train_set and test_set: the train and test sections of the matrix
+#   train_cts and test_cts: the train and test sections of the Ct value list corresponding to the rows of the train and test sets
+
+def splitMat(mat, ct_lst, inds, num_folds, i):
+    # getting the test and train indices for this fold
+    train_inds, test_inds = foldInds(inds, num_folds, i)
 
     # selecting the correct rows of the matrix for the train and test sets based on the indices
     train_set = mat[train_inds, :]
@@ -146,81 +177,135 @@ def getCI(lst):
     return ci_s
 
 
+# evaluates the model with 5 fold cross validation, fitting a new model on each fold
+# parameters:
+#   model: the (unfitted) model to evaluate
+#   mat: the pileup matrix
+#   ct_lst: the ordered list of Ct values corresponding to the order of rows in the matrix
+#   inds: the randomly shuffled list of all indices in the matrix
+#   num_folds: the total number of folds
+# returns:
+#   r2s and rmses: the lists of the R2 score and RMSE of every fold
+def crossValidate(model, mat, ct_lst, inds, num_folds):
+    r2s = []
+    rmses = []
+    for i in range(num_folds):
+        print("\tStarted fold ", (i + 1))
+
+        # splitting the matrix and metadata lists into train and test sets
+        train_set, train_lab, test_set, test_lab = splitMat(mat, ct_lst, inds, num_folds, i)
+
+        # training model:
+        model.fit(train_set, train_lab)
+
+        predictions = model.predict(test_set) # getting predictions
+        # evaluating model accuracy:
+        rmse = math.sqrt(mean_squared_error(test_lab, predictions))
+        rmses.append(rmse)
+        r2 = r2_score(test_lab, predictions)
+        r2s.append(r2)
+        print("\tResults from this fold: R2: ", r2, "  RMSE: ", rmse)
+    return r2s, rmses
+
+
+# evaluates a model fitted on all the data (with oob_score=True) using its out-of-bag predictions
+# every row is predicted only by the trees that did not sample it, so no refitting is needed
+# the out-of-bag predictions are scored on the same test sets as the cross validation folds so that the results are comparable
+# parameters:
+#   model: the model fitted on all the data
+#   ct_lst: the ordered list of Ct values corresponding to the order of rows in the matrix
+#   inds: the randomly shuffled list of all indices in the matrix
+#   num_folds: the total number of folds
+# returns:
+#   r2s and rmses: the lists of the R2 score and RMSE of the out-of-bag predictions of every fold's test set
+def oobEvaluate(model, ct_lst, inds, num_folds):
+    r2s = []
+    rmses = []
+    oob_preds = model.oob_prediction_
+    for i in range(num_folds):
+        train_inds, test_inds = foldInds(inds, num_folds, i)
+        test_lab = [ct_lst[j] for j in test_inds]
+        predictions = oob_preds[test_inds]
+        rmses.append(math.sqrt(mean_squared_error(test_lab, predictions)))
+        r2s.append(r2_score(test_lab, predictions))
+    return r2s, rmses
+
+
+# formats the R2 scores and RMSEs of every fold and their averages with confidence intervals
+# parameters:
+#   title: the title of this section of the output
+#   r2s and rmses: the lists of the R2 score and RMSE of every fold
+# returns:
+#   s: the formatted string
+#   r2_ci and rmse_ci: the strings of the average and confidence interval of the R2 scores and RMSEs
+def formatScores(title, r2s, rmses):
+    # getting averages with confidence intervals from folds:
+    r2_ci = getCI(r2s)
+    rmse_ci = getCI(rmses)
+
+    s = title + ":\n\tR2s:  [" + ", ".join([str(r2) for r2 in r2s]) + "]"
+    s+="\n\tRMSEs:  [" + ", ".join([str(rmse) for rmse in rmses]) + "]"
+    s+="\n\nAverages:\n\tR2: " + r2_ci + "\n\tRMSE: " + rmse_ci
+    return s, r2_ci, rmse_ci
+
+
 # main functions
-# trains a model on a pileup matrix evaluates the model via 5 fold cross validation
+# trains a model on a pileup matrix and evaluates the model via 5 fold cross validation and/or out-of-bag predictions
 def main():
     args = sys.argv
     start_dir = os.getcwd() # current directory
 
     # set parameters:
-    out_dir, mat_name, ct_name, out_file, model_name, num_trees, tree_depth, row_subsampling = parseParams(args, start_dir)
+    out_dir, mat_name, ct_name, out_file, model_name, num_trees, tree_depth, row_subsampling, eval_mode, qc_percentile = parseParams(args, start_dir)
     print("--trainModel.py-- set parameters")
 
-    # initializing the model
-    model =  RandomForestRegressor(n_estimators=num_trees, max_depth=tree_depth, random_state=42, max_samples=row_subsampling)
-
     # opening matrix:
     mat_open = np.load(mat_name, allow_pickle=True)
     # opening the Ct value list:
     fi = open(ct_name, "rb")
     ct_lst = pickle.load(fi)
 
-    # initializing lists to store the results
-    r2s = []
-    rmses = []
-
     # Generating a randomly shuffled list of matrix indices for the cross validation
     r, c = mat_open.shape
     inds = list(range(r))
     random.Random(42).shuffle(inds)
-
-    # starting the cross validation
     num_folds = 5
-    for i in range(num_folds):
-        print("\tStarted fold ", (i + 1))
 
-        # splitting the matrix and metadata lists into train and test sets
-        train_set, train_lab, test_set, test_lab = splitMat(mat_open, ct_lst, inds, num_folds, i)
-
-        # training model:
-        model.fit(train_set, train_lab)
-
-        # store the model from the first fold:
-        if (i == 0):
-            with open(model_name,'wb') as f:
-                pickle.dump(model,f)
+    s = "Model Accuracy:"
+    results = ""
 
-        predictions = model.predict(test_set) # getting predictions
-        # evaluating model accuracy:
-        rmse = math.sqrt(mean_squared_error(test_lab, predictions))
-        rmses.append(rmse)
-        r2 = r2_score(test_lab, predictions)
-        r2s.append(r2)
-        print("\tResults from this fold: R2: ", r2, "  RMSE: ", rmse)
-
-    # getting averages with confidence intervals from  folds:
-    r2_ci = getCI(r2s)
-    rmse_ci = getCI(rmses)
+    # starting the cross validation
+    if (eval_mode == "cv" or eval_mode == "both"):
+        model =  RandomForestRegressor(n_estimators=num_trees, max_depth=tree_depth, random_state=42, max_samples=row_subsampling)
+        r2s, rmses = crossValidate(model, mat_open, ct_lst, inds, num_folds)
+        s_cv, r2_ci, rmse_ci = formatScores("Accuracy per Fold", r2s, rmses)
+        s+="\n\n" + s_cv
+        results+="\n5 fold cross validation:\n\tR2: " + r2_ci + "\n\tRMSE: " + rmse_ci
+
+    # training the final model on all the data, its out-of-bag predictions are computed during the fit
+    print("\tTraining model on all data")
+    oob = (eval_mode == "oob" or eval_mode == "both")
+    model =  RandomForestRegressor(n_estimators=num_trees, max_depth=tree_depth, random_state=42, max_samples=row_subsampling, oob_score=oob)
+    model.fit(mat_open, ct_lst)
+    with open(model_name,'wb') as f:
+        pickle.dump(model,f)
+
+    # storing the feature statistics of the training data next to the model, predictCt.py uses them to screen pileup files
+    with open(pileupQC.statsName(model_name),'wb') as f:
+        pickle.dump(pileupQC.featureStats(mat_open, qc_percentile),f)
+
+    if (oob):
+        r2s, rmses = oobEvaluate(model, ct_lst, inds, num_folds)
+        s_oob, r2_ci, rmse_ci = formatScores("Out-of-Bag Accuracy per Fold", r2s, rmses)
+        s+="\n\n" + s_oob
+        results+="\nOut-of-bag:\n\tR2: " + r2_ci + "\n\tRMSE: " + rmse_ci
 
     # writing the results to the output file:
-    s = "Model Accuracy:\n\nAccuracy per Fold:\n\tR2s:  ["
-    for i in range(len(r2s)):
-        if (i != 4):
-            s+=str(r2s[i]) + ", "
-        else:
-            s+=str(r2s[i]) + "]"
-    s+="\n\tRMSEs:  ["
-    for i in range(len(rmses)):
-        if (i != 4):
-            s+=str(rmses[i]) + ", "
-        else:
-            s+=str(rmses[i]) + "]"
-    s+="\n\nAverages:\n\tR2: " + r2_ci + "\n\tRMSE: " + rmse_ci
     f = open(out_file, "a")
     f.write(s)
     f.close()
 
-    print("\n\n--trainModel.py-- finished script. Stored all output as: ", out_file, "\nResults:\n\tR2: ", r2_ci, "\n\tRMSE: ", rmse_ci)
+    print("\n\n--trainModel.py-- finished script. Stored all output as: ", out_file, " and model as: ", model_name, "\nResults:", results)
 
 # if this is the script called by python (vs being called by another)
 # script, run main().